@@ -1,19 +1,73 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import os
+import html
+import math
 import time
 import logging
+import random
 import re
+import threading
+import uuid
+import zlib
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
 from typing import Optional, Dict, Any
+import brotli
+import gevent
+import orjson
 import requests
-from bs4 import BeautifulSoup
+from cachetools import TTLCache
+from gevent import monkey
+from requests.adapters import HTTPAdapter
 
 # YouTube transcript API
-from youtube_transcript_api import YouTubeTranscriptApi
+from youtube_transcript_api import YouTubeTranscriptApi, YouTubeRequestFailed
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson
+    
+    Honors sort_keys, indent (always rendered as 2 spaces) and default, and accepts non-string keys.
+    Any other keyword argument, including separators, falls back to Flask's stdlib-based provider.
+    Dates and datetimes still go through default, so they keep Flask's HTTP-date format. Output is
+    UTF-8 rather than ASCII-escaped.
+    """
+    
+    _ORJSON_KWARGS = {'sort_keys', 'indent', 'default'}
+    
+    def _orjson_dumps(self, obj: Any, **kwargs: Any) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option)
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if not kwargs.keys() <= self._ORJSON_KWARGS:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj, **kwargs).decode()
+    
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+    
+    def response_body(self, obj: Any) -> bytes:
+        """Serialize obj exactly as response() sends it"""
+        # Pretty-print in debug mode, like DefaultJSONProvider
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        return self._orjson_dumps(obj, indent=2 if pretty else None) + b"\n"
+    
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.response_body(obj), mimetype=self.mimetype)
 
 # Create Flask app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)
 
 # Configure logging
@@ -26,23 +80,193 @@ logger = logging.getLogger(__name__)
 # Configuration
 REQUEST_DELAY = float(os.getenv('REQUEST_DELAY', '1.0'))
 MAX_REQUESTS_PER_MINUTE = int(os.getenv('MAX_REQUESTS_PER_MINUTE', '30'))
+METADATA_MAX_BYTES = int(os.getenv('METADATA_MAX_BYTES', '262144'))
+TRANSCRIPT_CACHE_TTL = int(os.getenv('TRANSCRIPT_CACHE_TTL', '3600'))
+METADATA_CACHE_TTL = int(os.getenv('METADATA_CACHE_TTL', '86400'))
+RETRY_ATTEMPTS = int(os.getenv('RETRY_ATTEMPTS', '4'))
+BREAKER_THRESHOLD = int(os.getenv('BREAKER_THRESHOLD', '5'))
+BREAKER_COOLDOWN = float(os.getenv('BREAKER_COOLDOWN', '30.0'))
+REQUEST_DEADLINE = float(os.getenv('REQUEST_DEADLINE', '20.0'))
+WORKER_CONNECTIONS = int(os.getenv('WORKER_CONNECTIONS', '200'))
+COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', '5'))
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+
+# Precompiled patterns
+_VID_RE = re.compile(r'(?:youtube\.com\/(?:[^\/]+\/.+\/|(?:v|e(?:mbed)?)\/|.*[?&]v=)|youtu\.be\/)([^"&?\/\s]{11})')
+_BRACKET_RE = re.compile(r'\[.*?\]')
+_WS_RE = re.compile(r'\s+')
+_ISO_DUR_RE = re.compile(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?')
+_OG_TITLE_RE = re.compile(rb'<meta(?=[^>]*\sproperty="og:title")[^>]*\scontent="([^"]*)"', re.I)
+_OG_DESC_RE = re.compile(rb'<meta(?=[^>]*\sproperty="og:description")[^>]*\scontent="([^"]*)"', re.I)
+_TITLE_TAG_RE = re.compile(rb'<title[^>]*>(.*?)</title>', re.I | re.S)
+_LD_VIDEO_RE = re.compile(rb'"@type"\s*:\s*"VideoObject"')
+_LD_DUR_RE = re.compile(rb'"duration"\s*:\s*"(PT[^"]+)"')
+_LD_JSON_RE = re.compile(rb'<script[^>]+type="application/ld\+json"[^>]*>(.*?)</script>', re.I | re.S)
+
+# Browser-like headers sent with every watch page request
+_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+}
+
+# Shared HTTP session so metadata fetches reuse keep-alive connections to YouTube
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=0))
+_session.headers.update(_HEADERS)
+
+# Worker pool for overlapping independent YouTube calls; each request takes up to
+# two slots (transcript + metadata), so size it to match gunicorn's connection limit
+_executor = ThreadPoolExecutor(max_workers=2 * WORKER_CONNECTIONS)
+
+# In-process caches of successful fetches, keyed by video ID
+_transcript_cache = TTLCache(maxsize=1024, ttl=TRANSCRIPT_CACHE_TTL)
+_metadata_cache = TTLCache(maxsize=2048, ttl=METADATA_CACHE_TTL)
+_cache_lock = threading.Lock()
+
+# Circuit breaker state for YouTube calls
+_fail_count = 0
+_opened_at = 0.0
+_probe_in_flight = False
+_breaker_lock = threading.Lock()
+
+class CircuitOpenError(Exception):
+    """Raised when YouTube calls are short-circuited after repeated failures"""
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs past its end-to-end deadline
+    
+    Deliberately not a TimeoutError/OSError, so urllib3 cannot mistake it for a socket timeout.
+    """
+
+# Token bucket rate limiting
+_tokens = float(MAX_REQUESTS_PER_MINUTE)
+_last_refill = time.monotonic()
+_rate_lock = threading.Lock()
 
-# Simple rate limiting
-request_timestamps = []
+def _refill_tokens(now: float):
+    """Top up the bucket for the time elapsed since the last refill (caller holds lock)"""
+    global _tokens, _last_refill
+    _tokens = min(MAX_REQUESTS_PER_MINUTE, _tokens + (now - _last_refill) * MAX_REQUESTS_PER_MINUTE / 60.0)
+    _last_refill = now
 
 def rate_limit_check():
     """Simple rate limiting check"""
-    now = time.time()
-    global request_timestamps
+    global _tokens
+    with _rate_lock:
+        _refill_tokens(time.monotonic())
+        
+        if _tokens < 1:
+            return False
+        
+        _tokens -= 1
+        return True
+
+def current_load() -> int:
+    """Approximate number of requests counted against the current minute"""
+    with _rate_lock:
+        _refill_tokens(time.monotonic())
+        return int(MAX_REQUESTS_PER_MINUTE - _tokens)
+
+def _is_transient(error: Exception) -> bool:
+    """Whether an error is worth retrying (network trouble or a YouTube 5xx)"""
+    if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(error, YouTubeRequestFailed):
+        # The transcript library re-raises HTTPError as YouTubeRequestFailed
+        error = error.__context__
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code >= 500
+    return False
+
+def breaker_allows() -> bool:
+    """Closed below the failure threshold; half-open once the cooldown has passed and no probe is running"""
+    with _breaker_lock:
+        if _fail_count < BREAKER_THRESHOLD:
+            return True
+        return not _probe_in_flight and time.monotonic() - _opened_at >= BREAKER_COOLDOWN
+
+def _breaker_acquire() -> bool:
+    """Admit a YouTube call or raise CircuitOpenError; returns True if this call is the half-open probe"""
+    global _probe_in_flight
+    with _breaker_lock:
+        if _fail_count < BREAKER_THRESHOLD:
+            return False
+        if _probe_in_flight or time.monotonic() - _opened_at < BREAKER_COOLDOWN:
+            raise CircuitOpenError("YouTube is failing, circuit open")
+        
+        _probe_in_flight = True
+        return True
+
+def _record_result(failed: Optional[bool], probe: bool):
+    """Update breaker state after a logical YouTube call (failed=None means it never ran)"""
+    global _fail_count, _opened_at, _probe_in_flight
+    with _breaker_lock:
+        if probe:
+            _probe_in_flight = False
+        if failed is None:
+            return
+        if not failed:
+            _fail_count = 0
+            return
+        
+        _fail_count += 1
+        if _fail_count >= BREAKER_THRESHOLD:
+            if _fail_count == BREAKER_THRESHOLD or probe:
+                logger.warning(f"Circuit opened after {_fail_count} consecutive YouTube failures")
+            _opened_at = time.monotonic()
+
+def check_deadline(deadline: Optional[float]):
+    """Raise DeadlineExceeded once the request deadline (a time.monotonic() value) has passed"""
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+def call_with_deadline(fn, deadline: Optional[float]):
+    """Call fn, interrupting it with DeadlineExceeded at the deadline
     
-    # Remove timestamps older than 1 minute
-    request_timestamps = [ts for ts in request_timestamps if now - ts < 60]
+    youtube-transcript-api sets no socket timeouts, so this is the only hard bound on its calls. It relies
+    on gevent's patched sockets (the gunicorn gevent workers); elsewhere fn runs unbounded.
+    """
+    if deadline is None or not monkey.is_module_patched('socket'):
+        return fn()
     
-    if len(request_timestamps) >= MAX_REQUESTS_PER_MINUTE:
-        return False
+    with gevent.Timeout(max(0.0, deadline - time.monotonic()), DeadlineExceeded("Request deadline exceeded")):
+        return fn()
+
+def with_retry(fn, attempts: int = RETRY_ATTEMPTS, base: float = 0.1, cap: float = 5.0,
+               deadline: Optional[float] = None):
+    """Call fn, retrying transient errors with full-jitter exponential backoff
     
-    request_timestamps.append(now)
-    return True
+    The whole call, retries included, counts as one success or failure for the circuit breaker.
+    """
+    probe = _breaker_acquire()
+    failed = None
+    try:
+        for attempt in range(attempts):
+            check_deadline(deadline)
+            try:
+                result = call_with_deadline(fn, deadline)
+            except DeadlineExceeded:
+                # A call still hanging at the deadline counts against YouTube
+                failed = True
+                raise
+            except Exception as e:
+                failed = _is_transient(e)
+                if not failed or attempt == attempts - 1:
+                    raise
+                
+                delay = random.uniform(0, min(cap, base * 2 ** attempt))
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    raise
+                logger.info(f"Transient YouTube error, retrying in {delay:.2f}s: {str(e)[:100]}")
+                time.sleep(delay)
+            else:
+                failed = False
+                return result
+    finally:
+        _record_result(failed, probe)
 
 def extract_video_id(youtube_url: str) -> Optional[str]:
     """Extract YouTube video ID from URL"""
@@ -50,15 +274,14 @@ def extract_video_id(youtube_url: str) -> Optional[str]:
         logger.info(f"Extracting video ID from: {youtube_url}")
         
         if "watch?v=" in youtube_url:
-            video_id = youtube_url.split("watch?v=")[-1].split("&")[0]
+            video_id = youtube_url.rpartition("watch?v=")[2].partition("&")[0].partition("#")[0]
         elif "youtu.be/" in youtube_url:
-            video_id = youtube_url.split("youtu.be/")[-1].split("?")[0]
+            video_id = youtube_url.rpartition("youtu.be/")[2].partition("?")[0].partition("#")[0]
         elif "embed/" in youtube_url:
-            video_id = youtube_url.split("embed/")[-1].split("?")[0]
+            video_id = youtube_url.rpartition("embed/")[2].partition("?")[0].partition("#")[0]
         else:
             # Regex fallback
-            pattern = r'(?:youtube\.com\/(?:[^\/]+\/.+\/|(?:v|e(?:mbed)?)\/|.*[?&]v=)|youtu\.be\/)([^"&?\/\s]{11})'
-            match = re.search(pattern, youtube_url)
+            match = _VID_RE.search(youtube_url)
             video_id = match.group(1) if match else None
         
         if video_id and len(video_id) == 11:
@@ -72,149 +295,233 @@ def extract_video_id(youtube_url: str) -> Optional[str]:
         logger.error(f"Error extracting video ID from {youtube_url}: {e}")
         return None
 
-def fetch_transcript(video_id: str) -> tuple[str, bool, str]:
-    """Fetch transcript for YouTube video"""
+def fetch_transcript(video_id: str, deadline: Optional[float] = None) -> tuple[str, bool, str]:
+    """Fetch transcript for YouTube video
+    
+    Raises DeadlineExceeded if the deadline passes and CircuitOpenError while YouTube calls are short-circuited.
+    """
+    with _cache_lock:
+        cached = _transcript_cache.get(video_id)
+    if cached is not None:
+        logger.info(f"Transcript cache hit for video ID: {video_id}")
+        return cached, True, ""
+    
+    if not breaker_allows():
+        logger.warning(f"Circuit open, skipping transcript fetch for {video_id}")
+        raise CircuitOpenError("YouTube is failing, circuit open")
+    
     try:
         logger.info(f"Fetching transcript for video ID: {video_id}")
-        time.sleep(REQUEST_DELAY)
+        if deadline is None:
+            time.sleep(REQUEST_DELAY)
+        else:
+            time.sleep(min(REQUEST_DELAY, max(0.0, deadline - time.monotonic())))
         
         transcript_text = ""
         
         # Method 1: Try default transcript
         try:
-            transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-            transcript_text = " ".join([item['text'] for item in transcript_list])
+            check_deadline(deadline)
+            transcript_list = with_retry(lambda: YouTubeTranscriptApi.get_transcript(video_id), deadline=deadline)
+            transcript_text = " ".join(map(itemgetter('text'), transcript_list))
             logger.info(f"Success with default method: {len(transcript_text)} chars")
             
+        except (DeadlineExceeded, CircuitOpenError):
+            raise
         except Exception as e1:
             logger.info(f"Default method failed: {str(e1)[:100]}")
             
             # Method 2: Try with specific languages
             try:
-                transcript_list = YouTubeTranscriptApi.get_transcript(
+                check_deadline(deadline)
+                transcript_list = with_retry(lambda: YouTubeTranscriptApi.get_transcript(
                     video_id, languages=['en', 'en-US', 'en-GB', 'auto']
-                )
-                transcript_text = " ".join([item['text'] for item in transcript_list])
+                ), deadline=deadline)
+                transcript_text = " ".join(map(itemgetter('text'), transcript_list))
                 logger.info(f"Success with language method: {len(transcript_text)} chars")
                 
+            except (DeadlineExceeded, CircuitOpenError):
+                raise
             except Exception as e2:
                 logger.info(f"Language method failed: {str(e2)[:100]}")
                 
                 # Method 3: Try any available transcript
                 try:
-                    transcript_list_obj = YouTubeTranscriptApi.list_transcripts(video_id)
-                    available_transcripts = list(transcript_list_obj)
+                    check_deadline(deadline)
+                    transcript_list_obj = with_retry(
+                        lambda: YouTubeTranscriptApi.list_transcripts(video_id), deadline=deadline
+                    )
                     
-                    if available_transcripts:
-                        logger.info(f"Found {len(available_transcripts)} available transcripts")
-                        
-                        for transcript in available_transcripts:
-                            try:
-                                transcript_data = transcript.fetch()
-                                transcript_text = " ".join([item['text'] for item in transcript_data])
-                                logger.info(f"Success with transcript in {transcript.language}: {len(transcript_text)} chars")
-                                break
-                            except Exception as e_inner:
-                                logger.info(f"Failed transcript {transcript.language}: {str(e_inner)[:50]}")
-                                continue
+                    for transcript in transcript_list_obj:
+                        try:
+                            check_deadline(deadline)
+                            transcript_data = with_retry(transcript.fetch, deadline=deadline)
+                            transcript_text = " ".join(map(itemgetter('text'), transcript_data))
+                            logger.info(f"Success with transcript in {transcript.language}: {len(transcript_text)} chars")
+                            break
+                        except (DeadlineExceeded, CircuitOpenError):
+                            raise
+                        except Exception as e_inner:
+                            logger.info(f"Failed transcript {transcript.language}: {str(e_inner)[:50]}")
+                            continue
                     
                     if not transcript_text:
                         return "", False, "No accessible transcripts found"
                         
+                except (DeadlineExceeded, CircuitOpenError):
+                    raise
                 except Exception as e3:
                     logger.warning(f"All transcript methods failed: {str(e3)[:100]}")
                     return "", False, f"No transcript available: {str(e1)[:100]}"
         
         if transcript_text:
             # Clean transcript
-            transcript_text = re.sub(r'\[.*?\]', '', transcript_text)  # Remove [Music], etc.
-            transcript_text = re.sub(r'\s+', ' ', transcript_text).strip()
+            transcript_text = _BRACKET_RE.sub('', transcript_text)  # Remove [Music], etc.
+            transcript_text = _WS_RE.sub(' ', transcript_text).strip()
             logger.info(f"Transcript cleaned and ready: {len(transcript_text)} chars")
+            with _cache_lock:
+                _transcript_cache[video_id] = transcript_text
             return transcript_text, True, ""
         else:
             return "", False, "No transcript text extracted"
             
+    except DeadlineExceeded:
+        logger.warning(f"Transcript fetch for {video_id} exceeded request deadline")
+        raise
+    except CircuitOpenError:
+        logger.warning(f"Circuit opened during transcript fetch for {video_id}")
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Transcript fetch failed for {video_id}: {error_msg}")
         return "", False, error_msg
 
-def get_video_metadata(video_id: str) -> Dict[str, str]:
-    """Get video metadata using web scraping"""
+def read_page_head(response: requests.Response, max_bytes: int = METADATA_MAX_BYTES) -> bytes:
+    """Read a streamed page up to </head> or max_bytes, whichever comes first"""
+    buf = bytearray()
+    head_end = -1
+    
+    # A 206 body is already capped at max_bytes by our Range header, so drain it and let urllib3
+    # return the connection to the pool. A full 200 page is abandoned early instead, and closing a
+    # half-read response discards its connection; that is cheaper than downloading the whole page.
+    partial = response.status_code == 206
+    try:
+        for chunk in response.iter_content(chunk_size=16384):
+            if head_end < 0 and len(buf) < max_bytes:
+                buf += chunk
+                head_end = buf.find(b'</head>', max(0, len(buf) - len(chunk) - 6))
+            if not partial and (head_end >= 0 or len(buf) >= max_bytes):
+                break
+    finally:
+        response.close()
+    
+    end = head_end if head_end >= 0 else len(buf)
+    return bytes(buf[:min(end, max_bytes)])
+
+def format_iso_duration(duration_iso: str) -> Optional[str]:
+    """Format an ISO 8601 duration like PT1H2M3S as '1h 2m 3s'"""
+    match = _ISO_DUR_RE.match(duration_iso)
+    if not match:
+        return None
+    
+    hours = int(match.group(1)) if match.group(1) else 0
+    minutes = int(match.group(2)) if match.group(2) else 0
+    seconds = int(match.group(3)) if match.group(3) else 0
+    
+    if hours > 0:
+        return f"{hours}h {minutes}m {seconds}s"
+    elif minutes > 0:
+        return f"{minutes}m {seconds}s"
+    else:
+        return f"{seconds}s"
+
+def _match_text(pattern: re.Pattern, buf: bytes) -> Optional[str]:
+    """First capture group of pattern in buf, decoded and HTML-unescaped"""
+    match = pattern.search(buf)
+    return html.unescape(match.group(1).decode('utf-8', 'replace')) if match else None
+
+def get_video_metadata(video_id: str, deadline: Optional[float] = None) -> Dict[str, str]:
+    """Get video metadata by pattern-matching the watch page <head>"""
+    with _cache_lock:
+        cached = _metadata_cache.get(video_id)
+    if cached is not None:
+        return dict(cached)
+    
     try:
         logger.info(f"Fetching metadata for video ID: {video_id}")
-        time.sleep(REQUEST_DELAY)
         
         url = f"https://www.youtube.com/watch?v={video_id}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        }
         
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
+        # All fields we extract live in <head>, so skip the rest of the page
+        def fetch_page():
+            response = _session.get(
+                url,
+                headers={'Range': f'bytes=0-{METADATA_MAX_BYTES - 1}'},
+                timeout=(3.05, 15),
+                stream=True
+            )
+            try:
+                response.raise_for_status()
+            except requests.HTTPError:
+                response.close()
+                raise
+            return response
+        
+        response = with_retry(fetch_page, deadline=deadline)
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        buf = read_page_head(response)
         
         # Extract title
-        title = "Unknown Title"
-        title_tag = soup.find('meta', property='og:title')
-        if title_tag:
-            title = title_tag.get('content', 'Unknown Title')
-        elif soup.find('title'):
-            title = soup.find('title').get_text().replace(' - YouTube', '').strip()
+        title = _match_text(_OG_TITLE_RE, buf)
+        found_og_title = title is not None
+        if not found_og_title:
+            page_title = _match_text(_TITLE_TAG_RE, buf)
+            title = page_title.replace(' - YouTube', '').strip() if page_title else "Unknown Title"
         
         # Extract description
-        description = ""
-        desc_tag = soup.find('meta', property='og:description')
-        if desc_tag:
-            description = desc_tag.get('content', '')
+        description = _match_text(_OG_DESC_RE, buf) or ""
         
-        # Extract duration
+        # Extract duration from the VideoObject ld+json block
         duration = "Unknown"
-        try:
-            json_scripts = soup.find_all('script', type='application/ld+json')
-            for script in json_scripts:
-                try:
-                    import json
-                    data = json.loads(script.string)
-                    if isinstance(data, list):
-                        data = data[0] if data else {}
-                    
-                    if data.get('@type') == 'VideoObject':
-                        duration_iso = data.get('duration', '')
-                        if duration_iso and duration_iso.startswith('PT'):
-                            # Parse ISO 8601 duration
-                            pattern = r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?'
-                            match = re.match(pattern, duration_iso)
-                            if match:
-                                hours = int(match.group(1)) if match.group(1) else 0
-                                minutes = int(match.group(2)) if match.group(2) else 0
-                                seconds = int(match.group(3)) if match.group(3) else 0
-                                
-                                if hours > 0:
-                                    duration = f"{hours}h {minutes}m {seconds}s"
-                                elif minutes > 0:
-                                    duration = f"{minutes}m {seconds}s"
-                                else:
-                                    duration = f"{seconds}s"
-                        break
-                except:
-                    continue
-        except:
-            pass
+        for script in _LD_JSON_RE.finditer(buf):
+            payload = script.group(1).strip()
+            if not payload:
+                continue
+            
+            # Fast path: skip JSON parsing when the block plainly is the VideoObject
+            if _LD_VIDEO_RE.search(payload):
+                duration_match = _LD_DUR_RE.search(payload)
+                if duration_match:
+                    duration = format_iso_duration(duration_match.group(1).decode('ascii', 'replace')) or duration
+                    break
+            
+            try:
+                data = orjson.loads(payload)
+            except ValueError:
+                continue
+            
+            if isinstance(data, list):
+                data = data[0] if data else {}
+            
+            if isinstance(data, dict) and data.get('@type') == 'VideoObject':
+                duration_iso = data.get('duration', '')
+                if isinstance(duration_iso, str) and duration_iso.startswith('PT'):
+                    duration = format_iso_duration(duration_iso) or duration
+                break
         
         logger.info(f"Metadata extracted - Title: {title[:50]}..., Duration: {duration}")
         
-        return {
+        metadata = {
             'title': title,
             'description': description,
             'duration': duration,
             'url': url
         }
+        # Without og:title this is likely a consent or bot-check page, so don't pin it in the cache
+        if found_og_title:
+            with _cache_lock:
+                _metadata_cache[video_id] = metadata
+        return dict(metadata)
         
     except Exception as e:
         logger.warning(f"Could not fetch metadata for {video_id}: {e}")
@@ -225,6 +532,35 @@ def get_video_metadata(video_id: str) -> Dict[str, str]:
             'url': f"https://www.youtube.com/watch?v={video_id}"
         }
 
+def stream_json(data: Dict[str, Any], field: str, chunk_size: int = 65536):
+    """Yield data serialized as app.json.response() would, encoding the (large) string field in slices"""
+    value = data[field]
+    placeholder = f'"{uuid.uuid4().hex}"'.encode()
+    body = app.json.response_body({**data, field: placeholder[1:-1].decode()})
+    head, _, tail = body.partition(placeholder)
+    
+    yield head + b'"'
+    for i in range(0, len(value), chunk_size):
+        yield orjson.dumps(value[i:i + chunk_size])[1:-1]
+    yield b'"' + tail
+
+def negotiate_encoding() -> Optional[str]:
+    """Pick br or gzip from the request's Accept-Encoding, preferring br"""
+    return request.accept_encodings.best_match(['br', 'gzip'])
+
+def compress_stream(chunks, encoding: str):
+    """Compress byte chunks incrementally, flushing after each so the body never buffers in full"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=COMPRESS_LEVEL)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
 # Routes
 @app.route('/', methods=['GET'])
 def health_check():
@@ -248,7 +584,7 @@ def get_transcript():
             'error': 'Rate limit exceeded. Try again later.',
             'rate_limit': {
                 'max_requests_per_minute': MAX_REQUESTS_PER_MINUTE,
-                'current_requests': len(request_timestamps)
+                'current_requests': current_load()
             }
         }), 429
     
@@ -274,8 +610,37 @@ def get_transcript():
                 'error': 'Invalid YouTube URL. Please provide a valid YouTube video URL.'
             }), 400
         
-        # Fetch transcript
-        transcript, transcript_success, transcript_error = fetch_transcript(video_id)
+        # HIT only when nothing this request needs has to come from YouTube
+        with _cache_lock:
+            cached = video_id in _transcript_cache and (not include_metadata or video_id in _metadata_cache)
+        cache_status = 'HIT' if cached else 'MISS'
+        
+        # Fetch transcript and metadata concurrently, bounded by one end-to-end deadline
+        deadline = time.monotonic() + REQUEST_DEADLINE
+        transcript_future = _executor.submit(fetch_transcript, video_id, deadline)
+        metadata_future = _executor.submit(get_video_metadata, video_id, deadline) if include_metadata else None
+        
+        try:
+            transcript, transcript_success, transcript_error = transcript_future.result(
+                timeout=max(0.0, deadline - time.monotonic())
+            )
+        except (DeadlineExceeded, FutureTimeoutError):
+            logger.warning(f"Request deadline exceeded for {video_id}")
+            # Free queued work; running calls stop at the deadline via call_with_deadline
+            transcript_future.cancel()
+            if metadata_future:
+                metadata_future.cancel()
+            return jsonify({
+                'success': False,
+                'video_id': video_id,
+                'error': f'Timed out fetching transcript after {REQUEST_DEADLINE:.0f}s. Try again later.'
+            }), 504
+        except CircuitOpenError:
+            return jsonify({
+                'success': False,
+                'video_id': video_id,
+                'error': 'YouTube is temporarily unavailable. Try again later.'
+            }), 503, {'Retry-After': str(math.ceil(BREAKER_COOLDOWN))}
         
         # Prepare response
         response_data = {
@@ -288,11 +653,12 @@ def get_transcript():
         }
         
         # Add metadata if requested
-        if include_metadata:
+        if metadata_future:
             try:
-                metadata = get_video_metadata(video_id)
+                metadata = metadata_future.result(timeout=max(0.0, deadline - time.monotonic()))
                 response_data.update(metadata)
             except Exception as e:
+                metadata_future.cancel()
                 logger.warning(f"Metadata fetch failed: {e}")
                 response_data.update({
                     'title': 'Unknown Title',
@@ -303,10 +669,21 @@ def get_transcript():
         if not transcript_success:
             response_data['error'] = transcript_error
             logger.warning(f"Transcript fetch failed for {video_id}: {transcript_error}")
-            return jsonify(response_data), 404
+            return jsonify(response_data), 404, {'X-Cache': cache_status}
         
         logger.info(f"Successfully processed {video_id}: {len(transcript)} chars")
-        return jsonify(response_data), 200
+        body = stream_json(response_data, 'transcript')
+        encoding = negotiate_encoding() if len(transcript) >= COMPRESS_MIN_SIZE else None
+        response = Response(
+            compress_stream(body, encoding) if encoding else body,
+            status=200,
+            mimetype='application/json',
+            headers={'X-Cache': cache_status}
+        )
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
         
     except Exception as e:
         logger.error(f"API error: {e}")
@@ -320,7 +697,7 @@ def get_status():
     """Get API status"""
     return jsonify({
         'status': 'operational',
-        'current_load': len(request_timestamps),
+        'current_load': current_load(),
         'max_requests_per_minute': MAX_REQUESTS_PER_MINUTE,
         'request_delay': REQUEST_DELAY,
         'timestamp': datetime.utcnow().isoformat(),
@@ -0,0 +1,17 @@
+import os
+
+# Gunicorn configuration for Render
+# Requests spend almost all their time waiting on YouTube, so use cooperative
+# gevent workers that multiplex many sockets each instead of one per process.
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+worker_class = 'gevent'
+# Rate limiter, caches and circuit breaker live in each worker process, so more
+# than one worker multiplies MAX_REQUESTS_PER_MINUTE and splits the caches.
+workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', '200'))
+timeout = 30
+keepalive = 5
+
+# The gevent worker runs gevent.monkey.patch_all() before the app is imported,
+# so leave preloading off to keep ssl/socket imports after patching.
+preload_app = False